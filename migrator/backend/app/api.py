@@ -16,6 +16,7 @@ class ConfigIn(BaseModel):
     target_secret_ref: str
     max_workers: int = 8
     dry_run: bool = True
+    stamp_metadata: bool = False
 
 @router.post('/config')
 def save_config(cfg: ConfigIn):
@@ -0,0 +1,46 @@
+import hashlib, ssl, logging
+try:
+    from blake3 import blake3
+except ImportError:  # optional: fall back to SHA256-only checksums
+    blake3 = None
+
+def checksum_algorithms(legacy_sha256=False):
+    # BLAKE3 when available; SHA256 only as the fallback unless legacy_sha256 asks for both
+    algorithms = ['blake3'] if blake3 is not None else []
+    if not algorithms or legacy_sha256:
+        algorithms.append('sha256')
+    return algorithms
+
+class ObjectHasher:
+    """Hash a byte stream once with every configured algorithm."""
+    def __init__(self, algorithms):
+        self._hashers = {a: blake3(max_threads=blake3.AUTO) if a == 'blake3' else hashlib.sha256() for a in algorithms}
+
+    def update(self, data):
+        for h in self._hashers.values():
+            h.update(data)
+
+    def metadata(self):
+        return {a: h.hexdigest() for a, h in self._hashers.items()}
+
+def stamp_metadata(s3_client, bucket, key, metadata, transfer_config):
+    # S3 metadata is immutable; a server-side self-copy replaces it without moving bytes through us,
+    # but the target still reads and rewrites the whole object, so this is opt-in (stamp_metadata)
+    s3_client.copy({'Bucket': bucket, 'Key': key}, bucket, key,
+                   ExtraArgs={'Metadata': metadata, 'MetadataDirective': 'REPLACE'},
+                   Config=transfer_config)
+
+def cpu_has_sha_ni():
+    try:
+        with open('/proc/cpuinfo') as f:
+            return 'sha_ni' in f.read().split()
+    except OSError:
+        return None
+
+def log_hash_backend():
+    # OpenSSL 3 dispatches to SHA-NI at runtime; only hashlib's builtin fallback never does
+    backend = 'openssl' if hashlib.sha256.__name__ == 'openssl_sha256' else 'builtin'
+    logging.info(f"sha256 backend: {backend} ({ssl.OPENSSL_VERSION}), cpu sha_ni: {cpu_has_sha_ni()}, "
+                 f"blake3: {'yes' if blake3 is not None else 'no'}")
+    if backend != 'openssl':
+        logging.warning("hashlib is not built against OpenSSL; SHA256 runs without SHA-NI acceleration")
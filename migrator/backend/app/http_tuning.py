@@ -0,0 +1,24 @@
+import http.client
+
+def raise_http_blocksize(size=1024*1024):
+    # request bodies go out in blocksize writes (8 KiB http.client, 16 KiB urllib3 2.x), each a syscall and a GIL round-trip
+    init = http.client.HTTPConnection.__init__
+    if init.__code__.co_varnames[init.__code__.co_argcount - 1] == 'blocksize':
+        # last positional default; urllib3 1.x connections inherit it
+        init.__defaults__ = init.__defaults__[:-1] + (size,)
+    try:
+        import urllib3.connection
+    except ImportError:
+        return
+    # urllib3 2.x passes its own keyword-only default to http.client, separately for plain and TLS connections
+    for cls in (urllib3.connection.HTTPConnection, urllib3.connection.HTTPSConnection):
+        kwdefaults = cls.__init__.__kwdefaults__
+        if kwdefaults and 'blocksize' in kwdefaults:
+            kwdefaults['blocksize'] = size
+    try:
+        import botocore.httpsession
+    except ImportError:
+        return
+    # botocore hands its pools an explicit blocksize (128 KiB) when urllib3 2.x supports one
+    if botocore.httpsession.BUFFER_SIZE:
+        botocore.httpsession.BUFFER_SIZE = size
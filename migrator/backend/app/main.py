@@ -1,8 +1,8 @@
 # backend/app/main.py
 from fastapi import FastAPI, BackgroundTasks, HTTPException
 from pydantic import BaseModel
-import sqlite3, os, threading, subprocess, json
-from migrator import Migrator
+import sqlite3, os, subprocess, json
+from migrator import run_async
 
 app = FastAPI()
 DB = '/data/migrate.db'
@@ -18,6 +18,7 @@ class ConfigIn(BaseModel):
     target_bucket: str = None
     max_workers: int = 8
     dry_run: bool = False
+    stamp_metadata: bool = False
 
 # save config into file (restrict perms!)
 CONFIG_PATH = '/data/config.json'
@@ -38,12 +39,10 @@ async def save_config(cfg: ConfigIn):
 async def start_migration(background_tasks: BackgroundTasks):
     if not os.path.exists(CONFIG_PATH):
         raise HTTPException(status_code=400, detail='config missing')
-    # run in background
-    def runner():
-        m = Migrator(CONFIG_PATH, db_path=DB)
-        m.run_sync()
-    t = threading.Thread(target=runner, daemon=True)
-    t.start()
+    with open(CONFIG_PATH) as f:
+        cfg = json.load(f)
+    # coroutine runs on the server's event loop once the response is sent
+    background_tasks.add_task(run_async, cfg)
     return {'started': True}
 
 @app.get('/api/status')
@@ -1,18 +1,41 @@
-import os, hashlib, tempfile, logging
+import os, asyncio, logging
 import boto3
+from aiobotocore.session import get_session
+from aiobotocore.config import AioConfig
 from botocore.client import Config
 from boto3.s3.transfer import TransferConfig
+try:
+    from .http_tuning import raise_http_blocksize
+except ImportError:  # loaded as a top-level module (uvicorn main:app)
+    from http_tuning import raise_http_blocksize
+try:
+    from .hashing import ObjectHasher, checksum_algorithms, log_hash_backend, stamp_metadata
+except ImportError:  # loaded as a top-level module (uvicorn main:app)
+    from hashing import ObjectHasher, checksum_algorithms, log_hash_backend, stamp_metadata
 
 logging.basicConfig(level=logging.INFO)
 
+raise_http_blocksize()
+
+class HashingReader:
+    """Read-only file-like wrapper that feeds every chunk read through a hasher."""
+    def __init__(self, stream, hasher):
+        self._stream = stream
+        self._hasher = hasher
+
+    def read(self, size=-1):
+        chunk = self._stream.read(size if size is not None and size >= 0 else None)
+        self._hasher.update(chunk)
+        return chunk
+
 class Migrator:
     def __init__(self, cfg, aws_access_key, aws_secret_key, target_key, target_secret, region='us-east-1'):
         self.cfg = cfg
         self.region = region
         # source client using AWS creds
         self.src = boto3.client('s3', aws_access_key_id=aws_access_key, aws_secret_access_key=aws_secret_key, region_name=region, config=Config(signature_version='s3v4'))
-        # target client (S3 compatible)
-        self.tgt = boto3.client('s3', endpoint_url=cfg['target_endpoint'], aws_access_key_id=target_key, aws_secret_access_key=target_secret, config=Config(signature_version='s3v4'))
+        # target client (S3 compatible); bodies already carry our checksums, so SigV4 need not hash them again
+        self.tgt = boto3.client('s3', endpoint_url=cfg['target_endpoint'], aws_access_key_id=target_key, aws_secret_access_key=target_secret, config=Config(signature_version='s3v4', s3={'payload_signing_enabled': False}, retries={'mode': 'adaptive', 'max_attempts': 10}))
         self.temp_dir = os.getenv('TEMP_DIR', '/tmp/s3_migrator')
         os.makedirs(self.temp_dir, exist_ok=True)
 
@@ -22,28 +45,119 @@ class Migrator:
             for o in page.get('Contents', []):
                 yield o
 
-    def compute_sha256(self, path):
-        h = hashlib.sha256()
-        with open(path,'rb') as f:
-            for chunk in iter(lambda: f.read(8*1024*1024), b''):
-                h.update(chunk)
-        return h.hexdigest()
-
     def transfer_object(self, key):
-        # download to temp file
-        tmp = tempfile.NamedTemporaryFile(dir=self.temp_dir, delete=False)
+        # stream source body through the hasher straight into the target, no temp file
+        resp = self.src.get_object(Bucket=self.cfg['src_bucket'], Key=key)
+        target_bucket = self.cfg.get('target_bucket', self.cfg['src_bucket'])
+        mp_threshold = self.cfg.get('multipart_threshold', 50*1024*1024)
+        h = ObjectHasher(checksum_algorithms(self.cfg.get('legacy_sha256', False)))
+        if resp['ContentLength'] < mp_threshold:
+            body = resp['Body'].read()
+            h.update(body)
+            digests = h.metadata()
+            self.tgt.put_object(Bucket=target_bucket, Key=key, Body=body, Metadata=digests)
+            return True, digests
+        transfer_config = TransferConfig(multipart_threshold=mp_threshold, multipart_chunksize=16*1024*1024, max_concurrency=self.cfg.get('max_workers', 8), io_chunksize=1024*1024, use_threads=True)
+        self.tgt.upload_fileobj(HashingReader(resp['Body'], h), target_bucket, key, Config=transfer_config)
+        # the digest is only known after the upload: returned to the caller, and written to the object only on request
+        digests = h.metadata()
+        if self.cfg.get('stamp_metadata'):
+            stamp_metadata(self.tgt, target_bucket, key, digests, transfer_config)
+        return True, digests
+
+async def read_part(stream, size):
+    # aiohttp hands back whatever has arrived; keep reading until the part is full or the body ends
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = await stream.read(size - len(buf))
+        if not chunk:
+            break
+        buf += chunk
+    return bytes(buf)
+
+async def transfer_one(src, tgt, cfg, key, stamper=None):
+    src_bucket = cfg['src_bucket']
+    target_bucket = cfg.get('target_bucket') or src_bucket
+    mp_threshold = cfg.get('multipart_threshold', 50*1024*1024)
+    h = ObjectHasher(checksum_algorithms(cfg.get('legacy_sha256', False)))
+    resp = await src.get_object(Bucket=src_bucket, Key=key)
+    async with resp['Body'] as stream:
+        if resp['ContentLength'] < mp_threshold:
+            body = await stream.read()
+            await asyncio.to_thread(h.update, body)
+            digests = h.metadata()
+            await tgt.put_object(Bucket=target_bucket, Key=key, Body=body, Metadata=digests)
+            return digests
+        upload_id = (await tgt.create_multipart_upload(Bucket=target_bucket, Key=key))['UploadId']
+        # pipeline: the next part is read and hashed while earlier parts are still uploading
+        window = asyncio.Semaphore(4)
+        uploads = []
+
+        async def send(part_number, chunk):
+            try:
+                part = await tgt.upload_part(Bucket=target_bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=chunk)
+                return {'PartNumber': part_number, 'ETag': part['ETag']}
+            finally:
+                window.release()
+
         try:
-            resp = self.src.get_object(Bucket=self.cfg['src_bucket'], Key=key)
-            stream = resp['Body']
-            for chunk in iter(lambda: stream.read(8*1024*1024), b''):
-                tmp.write(chunk)
-            tmp.flush(); tmp.close()
-            sha = self.compute_sha256(tmp.name)
-            # upload with transfer config
-            mp_threshold = self.cfg.get('multipart_threshold', 50*1024*1024)
-            transfer_config = TransferConfig(multipart_threshold=mp_threshold, multipart_chunksize=8*1024*1024)
-            self.tgt.upload_file(tmp.name, self.cfg.get('target_bucket', self.cfg['src_bucket']), key, ExtraArgs={'Metadata': {'sha256': sha}}, Config=transfer_config)
-            return True, sha
-        finally:
-            try: os.remove(tmp.name)
-            except: pass
\ No newline at end of file
+            part_number = 1
+            part_size = max(8*1024*1024, -(-resp['ContentLength'] // 10000))  # S3 allows at most 10,000 parts
+            while True:
+                await window.acquire()
+                chunk = await read_part(stream, part_size)
+                if not chunk:
+                    window.release()
+                    break
+                # hashing a full chunk would stall the event loop, hand it to a thread
+                await asyncio.to_thread(h.update, chunk)
+                uploads.append(asyncio.create_task(send(part_number, chunk)))
+                part_number += 1
+            parts = await asyncio.gather(*uploads)
+            await tgt.complete_multipart_upload(Bucket=target_bucket, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts})
+        except Exception:
+            for task in uploads:
+                task.cancel()
+            await tgt.abort_multipart_upload(Bucket=target_bucket, Key=key, UploadId=upload_id)
+            raise
+    digests = h.metadata()
+    if stamper:
+        await asyncio.to_thread(stamp_metadata, stamper, target_bucket, key, digests, None)
+    return digests
+
+async def run_async(cfg):
+    """Scan the source bucket and transfer every object as bounded coroutines."""
+    log_hash_backend()
+    max_inflight = cfg.get('max_workers', 8) * 4
+    sem = asyncio.Semaphore(max_inflight)
+    session = get_session()
+    client_config = AioConfig(signature_version='s3v4', max_pool_connections=max_inflight, s3={'payload_signing_enabled': False})
+    async with session.create_client('s3', region_name=cfg.get('aws_region', 'us-east-1'), aws_access_key_id=cfg['aws_key'], aws_secret_access_key=cfg['aws_secret'], config=client_config) as src, \
+            session.create_client('s3', endpoint_url=cfg['target_endpoint'], aws_access_key_id=cfg['target_key'], aws_secret_access_key=cfg['target_secret'], config=client_config) as tgt:
+        # opt-in digest stamping is boto3's managed copy, run in a thread with its own blocking client
+        stamper = None
+        if cfg.get('stamp_metadata'):
+            stamper = boto3.client('s3', endpoint_url=cfg['target_endpoint'], aws_access_key_id=cfg['target_key'], aws_secret_access_key=cfg['target_secret'], config=Config(signature_version='s3v4', max_pool_connections=max_inflight))
+
+        async def bounded(key):
+            try:
+                digests = await transfer_one(src, tgt, cfg, key, stamper)
+                logging.info(f"Success: {key} {digests}")
+            except Exception:
+                logging.exception(f"Failed {key}")
+            finally:
+                sem.release()
+
+        tasks = set()
+        paginator = src.get_paginator('list_objects_v2')
+        async for page in paginator.paginate(Bucket=cfg['src_bucket']):
+            for o in page.get('Contents', []):
+                if cfg.get('dry_run'):
+                    logging.info(f"Dry-run: would transfer {o['Key']}")
+                    continue
+                # acquire before spawning so the scan cannot run ahead of the transfers
+                await sem.acquire()
+                task = asyncio.create_task(bounded(o['Key']))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
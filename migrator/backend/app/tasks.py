@@ -1,6 +1,7 @@
 from celery import Celery
 from .migrator import Migrator
-import json, os
+from .hashing import log_hash_backend
+import json, os, logging
 
 celery = Celery('worker', broker=os.getenv('CELERY_BROKER_URL'), backend=os.getenv('CELERY_RESULT_BACKEND','rpc://'))
 
@@ -14,14 +15,16 @@ def start_migration_task(self, cfg_path):
     aws_secret = os.getenv('AWS_SECRET')
     target_key = os.getenv('TARGET_KEY')
     target_secret = os.getenv('TARGET_SECRET')
+    log_hash_backend()
     mig = Migrator(cfg, aws_key, aws_secret, target_key, target_secret, region=os.getenv('AWS_REGION','us-east-1'))
     count = 0
     for o in mig.scan_source():
         key = o['Key']
         try:
-            ok, sha = mig.transfer_object(key)
+            ok, digests = mig.transfer_object(key)
             count += 1
-            self.update_state(state='PROGRESS', meta={'processed': count, 'last_key': key})
+            logging.info(f"Success: {key} {digests}")
+            self.update_state(state='PROGRESS', meta={'processed': count, 'last_key': key, 'last_digests': digests})
         except Exception as e:
             # log and continue
             continue
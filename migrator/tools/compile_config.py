@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+compile_config.py
+Compile a migrator YAML config into msgpack once, so runs load it without YAML parsing.
+Size expressions such as `50 * 1024 * 1024` are evaluated here.
+
+Usage: python tools/compile_config.py config.yaml [-o config.mpk]
+"""
+
+import os, sys, argparse
+import msgpack
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from s3_migrator_advanced import load_config
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config", help="YAML config to compile")
+    parser.add_argument("--output", "-o", help="output path (default: <config>.mpk)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.config)[0] + '.mpk'
+    cfg = load_config(args.config)
+    with open(output, 'wb') as f:
+        f.write(msgpack.packb(cfg, use_bin_type=True))
+    print(f"Wrote {output}")
+
+if __name__ == "__main__":
+    main()